@@ -5,14 +5,22 @@ import servicemanager
 import socket
 import sys
 import os
+import asyncio
+
+# The default ProactorEventLoop fails inside pythonservice.exe ("set_wakeup_fd only works in main thread")
+if sys.platform == 'win32':
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 # Add current directory to path so modules can be found
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from dotenv import load_dotenv
 from src.scheduler import TaskScheduler
+from src.utils import stop_logging
 
 class AsyncTaskAgentService(win32serviceutil.ServiceFramework):
-    _svc_name_ = "AsyncTaskAgent"
+    # Overridable so several instances can be installed from this one module
+    _svc_name_ = os.environ.get("ASYNC_TASK_AGENT_SERVICE_NAME", "AsyncTaskAgent")
     _svc_display_name_ = "Asynchronous Task Agent"
     _svc_description_ = "Asynchronous Task Agent Scheduler."
 
@@ -20,13 +28,14 @@ class AsyncTaskAgentService(win32serviceutil.ServiceFramework):
         win32serviceutil.ServiceFramework.__init__(self, args)
         self.hWaitStop = win32event.CreateEvent(None, 0, 0, None)
         socket.setdefaulttimeout(60)
+        load_dotenv() # GOOGLE_API_KEY etc. for the agent
         self.scheduler = None
 
     def SvcStop(self):
         self.ReportServiceStatus(win32service.SERVICE_STOP_PENDING)
         win32event.SetEvent(self.hWaitStop)
         if self.scheduler:
-            self.scheduler.running = False
+            self.scheduler.stop()
 
     def SvcDoRun(self):
         servicemanager.LogMsg(servicemanager.EVENTLOG_INFORMATION_TYPE,
@@ -36,27 +45,18 @@ class AsyncTaskAgentService(win32serviceutil.ServiceFramework):
         # Calculate Root Directory (The folder where this script is located)
         root_dir = os.path.dirname(os.path.abspath(__file__))
 
-        # Run 10 seconds check interval for service responsiveness, 
-        # but logic inside scheduler can enforce the 1 hour wait if re-architechted, 
-        # OR we just pass 3600 here. Passing 3600 means SvcStop might hang for 1 hour.
-        # BETTER: Pass a short interval to check 'running' flag, but only run tasks every hour.
-        # For simplicity of this prompt, we will stick to the requested 3600 but note the delay in stop.
-        # Ideally, the scheduler would sleep in small chunks.
-        
-        # Let's modify the scheduler usage slightly for better service behavior here or just stick to simple.
-        # We will use the simple Blocking Scheduler for now as requested.
-        
+        # The scheduler only runs tasks every hour, but it checks its 'running' flag
+        # every second, so SvcStop takes effect almost immediately.
         self.scheduler = TaskScheduler(check_interval=3600, root_dir=root_dir)
         
-        # We need to run the scheduler in a way that checks hWaitStop?
-        # The scheduler.start() is blocking. 
-        # For a robust service, we'd want the scheduler to not block for 3600s straight.
-        # For now, we will run the start() which blocks.
-        
+        # scheduler.start() blocks until SvcStop calls scheduler.stop().
         try:
              self.scheduler.start()
         except Exception as e:
             servicemanager.LogInfoMsg(f"Service Error: {e}")
+        finally:
+            # Flush queued log records before the service process exits
+            stop_logging()
 
 if __name__ == '__main__':
     win32serviceutil.HandleCommandLine(AsyncTaskAgentService)
@@ -1,10 +1,8 @@
 import os
+import re
 import asyncio
-import json
-from dotenv import load_dotenv
-from typing import Dict, Any, List
-
-load_dotenv()
+import itertools
+from typing import ClassVar, Dict, Any, List, Tuple
 
 # ADK Imports
 # specific imports dependent on google-adk package structure
@@ -18,26 +16,63 @@ try:
 except ImportError:
     # Fail gracefully if ADK not installed yet so other parts can be tested
     print("Warning: ADK libraries not found. Agent execution will fail.")
+    google_search = None # Keeps TaskRunner._TOOL_MAP importable
+
+from dotenv import load_dotenv
 
-from .utils import setup_logging
+from .utils import setup_logging, json_loads, json_dumps
 
 logger = setup_logging("TaskRunner")
 
+# Core system prompt; variants (e.g. a different output contract) can pass their own to TaskRunner
+DEFAULT_SYSTEM_INSTRUCTION = (
+    "You are an Asynchronous Task Agent. Your goal is to execute tasks over multiple iterations.\n\n"
+    "1. State Awareness: Every run, you receive a task_definition and a context (your memory). "
+    "Read the context to understand what was achieved in previous runs.\n"
+    "2. Execution: Perform the specific actions required by the task_definition using available tools.\n"
+    "3. Feedback Loop: After execution, you must determine what is left to do.\n"
+    "4. Output Format: You must always return two distinct blocks:\n\n"
+    "USER_REPORT: A human-readable summary of what you did.\n\n"
+    "NEW_MEMORY: A structured JSON object that updates the context field for your next run. "
+    "Ensure you include 'Next Steps' or 'Open Actions' for your future self."
+)
+
+# Per-run user message; only the task definition and context vary
+_USER_MESSAGE_TEMPLATE = (
+    "TASK DEFINITION:\n{task}\n\n"
+    "CURRENT CONTEXT (MEMORY):\n{context}\n\n"
+    "Please execute the task and provide the USER_REPORT and NEW_MEMORY."
+)
+
+# Markers the agent is instructed to emit, and the fenced JSON block expected after NEW_MEMORY
+_USER_REPORT_MARKER = "USER_REPORT:"
+_NEW_MEMORY_MARKER = "NEW_MEMORY:"
+_MEMORY_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+_EMPTY_CONTEXT = "{}"
+
+# Session ids only need to be unique within this process
+_session_counter = itertools.count()
+
 class TaskRunner:
-    def __init__(self):
-        self.tool_map = {
-            "google_search": google_search,
-            # Add more tools here as needed
-        }
-
-    def _get_tools(self, tool_names: List[str]) -> List[Any]:
-        tools = []
-        for name in tool_names:
-            if name in self.tool_map:
-                tools.append(self.tool_map[name])
-            else:
-                logger.warning(f"Tool '{name}' not found in tool_map.")
-        return tools
+    _TOOL_MAP: ClassVar[Dict[str, Any]] = {
+        "google_search": google_search,
+        # Add more tools here as needed
+    }
+
+    def __init__(self, system_instruction: str = DEFAULT_SYSTEM_INSTRUCTION):
+        self.system_instruction = system_instruction
+        # One session store for every task; each run creates (and later deletes) its own session
+        self.session_service = InMemorySessionService()
+        # (model_name, tool_names, task_name) -> (agent, runner), reused across runs
+        self._agent_cache: Dict[Tuple, Tuple[Any, Any]] = {}
+
+    @classmethod
+    def _get_tools(cls, tool_names: List[str]) -> List[Any]:
+        missing = set(tool_names) - cls._TOOL_MAP.keys()
+        for name in missing:
+            logger.warning(f"Tool '{name}' not found in tool_map.")
+        return [cls._TOOL_MAP[name] for name in tool_names if name in cls._TOOL_MAP]
 
     async def run_task(self, task_config: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -50,58 +85,50 @@ class TaskRunner:
             
             # Context is now expected to be a JSON object (dict), but handle legacy string just in case
             context_data = task_config.get("context", {})
-            if isinstance(context_data, str) and context_data:
+            if not context_data:
+                # First run: nothing to serialize
+                context_str = _EMPTY_CONTEXT
+            elif isinstance(context_data, str):
                 # Legacy support or simple string
                 context_str = context_data
             else:
-                context_str = json.dumps(context_data, indent=2)
+                context_str = json_dumps(context_data).decode("utf-8")
 
             tool_names = task_config.get("tools", [])
             model_name = task_config.get("model", "gemini-2.5-flash-lite") 
 
             logger.info(f"Starting execution for task: {task_name}")
 
-            # Construct Core System Prompt
-            system_instruction = (
-                "You are an Asynchronous Task Agent. Your goal is to execute tasks over multiple iterations.\n\n"
-                "1. State Awareness: Every run, you receive a task_definition and a context (your memory). "
-                "Read the context to understand what was achieved in previous runs.\n"
-                "2. Execution: Perform the specific actions required by the task_definition using available tools.\n"
-                "3. Feedback Loop: After execution, you must determine what is left to do.\n"
-                "4. Output Format: You must always return two distinct blocks:\n\n"
-                "USER_REPORT: A human-readable summary of what you did.\n\n"
-                "NEW_MEMORY: A structured JSON object that updates the context field for your next run. "
-                "Ensure you include 'Next Steps' or 'Open Actions' for your future self."
-            )
-
             # Construct User Message
-            user_message = (
-                f"TASK DEFINITION:\n{task_definition}\n\n"
-                f"CURRENT CONTEXT (MEMORY):\n{context_str}\n\n"
-                "Please execute the task and provide the USER_REPORT and NEW_MEMORY."
-            )
-
-            tools = self._get_tools(tool_names)
-
-            # Define Model Explicitly to pass API Key
-            model = Gemini(model=model_name, api_key=os.getenv("GOOGLE_API_KEY"))
-
-            agent = Agent(
-                name=task_name.replace(" ", "_").lower(),
-                model=model,
-                description=f"Agent for task: {task_name}",
-                instruction=system_instruction,
-                tools=tools
-            )
+            user_message = _USER_MESSAGE_TEMPLATE.format(task=task_definition, context=context_str)
 
             # Unique session info for this run
             app_name = f"async_agent_{task_name}"
             user_id = "scheduler_user"
-            session_id = f"sess_{os.urandom(4).hex()}"
+            session_id = f"sess_{next(_session_counter):08x}"
+
+            # Model, agent and runner only depend on these fields, so build them once per task
+            cache_key = (model_name, tuple(sorted(tool_names)), task_name)
+            cached = self._agent_cache.get(cache_key)
+            if cached is None:
+                tools = self._get_tools(tool_names)
+
+                # Define Model Explicitly to pass API Key
+                model = Gemini(model=model_name, api_key=os.getenv("GOOGLE_API_KEY"))
+
+                agent = Agent(
+                    name=task_name.replace(" ", "_").lower(),
+                    model=model,
+                    description=f"Agent for task: {task_name}",
+                    instruction=self.system_instruction,
+                    tools=tools
+                )
+
+                runner = Runner(agent=agent, app_name=app_name, session_service=self.session_service)
+                cached = self._agent_cache[cache_key] = (agent, runner)
+            agent, runner = cached
 
-            session_service = InMemorySessionService()
-            session = await session_service.create_session(app_name=app_name, user_id=user_id, session_id=session_id)
-            runner = Runner(agent=agent, app_name=app_name, session_service=session_service)
+            session = await self.session_service.create_session(app_name=app_name, user_id=user_id, session_id=session_id)
 
             content = types.Content(role='user', parts=[types.Part(text=user_message)])
             
@@ -110,28 +137,32 @@ class TaskRunner:
             final_response_text = ""
             events = runner.run_async(user_id=user_id, session_id=session_id, new_message=content)
 
-            async for event in events:
-                if event.is_final_response():
-                    final_response_text = event.content.parts[0].text
-                    logger.info("Task execution completed successfully.")
+            try:
+                async for event in events:
+                    if event.is_final_response():
+                        final_response_text = event.content.parts[0].text
+                        logger.info("Task execution completed successfully.")
+                        break # Nothing after the final response is used
+            finally:
+                await events.aclose()
+                # The session service outlives this run, so drop the finished session
+                await self.session_service.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
 
             # Parse Output
             report = ""
             new_memory = {}
 
-            if "USER_REPORT:" in final_response_text:
-                parts = final_response_text.split("USER_REPORT:")
-                # usually parts[0] is empty or intro, parts[1] is the rest.
-                # But we also have NEW_MEMORY somewhere.
-                # Let's try a regex or simple split.
-                remaining = parts[1]
-                if "NEW_MEMORY:" in remaining:
-                    report_part, memory_part = remaining.split("NEW_MEMORY:")
-                    report = report_part.strip()
+            # Locate both markers with one forward scan and slice once, instead of splitting the response
+            report_start = final_response_text.find(_USER_REPORT_MARKER)
+            if report_start != -1:
+                report_start += len(_USER_REPORT_MARKER)
+                memory_start = final_response_text.find(_NEW_MEMORY_MARKER, report_start)
+                if memory_start != -1:
+                    report = final_response_text[report_start:memory_start].strip()
+                    memory_part = final_response_text[memory_start + len(_NEW_MEMORY_MARKER):]
                     
                     # Robust JSON extraction
-                    import re
-                    json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", memory_part, re.DOTALL)
+                    json_match = _MEMORY_RE.search(memory_part)
                     
                     clean_memory = ""
                     if json_match:
@@ -148,14 +179,14 @@ class TaskRunner:
                     try:
                         if not clean_memory:
                             raise ValueError("Empty memory block found")
-                        new_memory = json.loads(clean_memory)
+                        new_memory = json_loads(clean_memory)
                     except Exception as e:
                         logger.error(f"Failed to parse NEW_MEMORY JSON. Raw content prefix: {memory_part[:100]}... Error: {e}")
                         # Fallback: keep old context if parsing fails? Or save error?
                         new_memory = context_data # Preserve old context
                         report += f"\n\n[SYSTEM ERROR: Failed to parse NEW_MEMORY. {str(e)}]"
                 else:
-                    report = remaining.strip()
+                    report = final_response_text[report_start:].strip()
                     logger.warning("NEW_MEMORY block missing from response.")
             else:
                 # Fallback if format not followed
@@ -176,4 +207,6 @@ class TaskRunner:
 
 # Synchronous wrapper if needed
 def run_task_sync(task_config: Dict[str, Any]) -> Dict[str, Any]:
+    # Standalone entry point, so load GOOGLE_API_KEY etc. like the scheduler and service do
+    load_dotenv()
     return asyncio.run(TaskRunner().run_task(task_config))
@@ -1,12 +1,22 @@
 import os
-import json
+import sys
 import time
+import heapq
 import datetime
-from dateutil import parser
 import asyncio
 
+# Optional libuv-based event loops; fall back to the stdlib loop if not installed
+try:
+    if sys.platform == 'win32':
+        import winloop as fast_loop
+    else:
+        import uvloop as fast_loop
+except ImportError:
+    fast_loop = None
+
 from .agent import TaskRunner
-from .utils import setup_logging, calculate_next_run, save_task_result, normalize_next_run
+from .task import Task, DEFAULT_FREQUENCY
+from .utils import setup_logging, advance, save_task_results_batch, normalize_next_run, load_task, save_task, parse_iso
 
 # We will initialize logger inside the class or after we know the root dir, 
 # BUT for module level logging, we might default to standard behavior.
@@ -16,7 +26,7 @@ from .utils import setup_logging, calculate_next_run, save_task_result, normaliz
 # Let's modify setup_logging usage.
 
 class TaskScheduler:
-    def __init__(self, tasks_dir: str = "tasks", check_interval: int = 3600, task_delay: int = 10, root_dir: str = None):
+    def __init__(self, tasks_dir: str = "tasks", check_interval: int = 3600, max_concurrency: int = 4, root_dir: str = None):
         self.root_dir = root_dir
         
         # If root_dir is provided and tasks_dir is relative, join them
@@ -26,45 +36,101 @@ class TaskScheduler:
             self.tasks_dir = tasks_dir
 
         self.check_interval = check_interval
-        self.task_delay = task_delay # Delay in seconds between sequential tasks
+        self.max_concurrency = max_concurrency # Max number of due tasks executed at the same time
         self.runner = TaskRunner()
         self.running = False
+        self._loop = None
+        # filepath -> ((st_mtime_ns, st_size), Task); files are only re-read when their stat changes
+        self._task_cache = {}
+        # Min-heap of (next_run timestamp, filepath) for tasks scheduled in the future, rebuilt by every
+        # process_tasks call; lets the loop wake up for the earliest task instead of waiting for check_interval
+        self._due_heap = []
         
         # Re-setup logging with correct path if root_dir is known
         global logger
         logger = setup_logging("Scheduler", root_dir=self.root_dir)
 
-    def load_tasks(self):
-        """Yields (filename, task_data) for all valid JSON tasks."""
-        if not os.path.exists(self.tasks_dir):
+    @staticmethod
+    def _read_task_batch(filepaths: list) -> list:
+        """Reads several task files, returning the Task or the raised exception for each."""
+        results = []
+        for filepath in filepaths:
+            try:
+                results.append(Task.from_dict(load_task(filepath)))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def _read_tasks(self, filepaths: list) -> list:
+        """Reads task files in a single worker-thread hop so disk I/O does not block the event loop."""
+        if not filepaths:
+            return []
+        return await asyncio.to_thread(self._read_task_batch, filepaths)
+
+    async def _write_task(self, filepath: str, task: Task):
+        """Writes a task file in a worker thread."""
+        await asyncio.to_thread(save_task, filepath, task.to_dict())
+
+    async def load_tasks(self):
+        """Yields (filepath, Task, filename) for all valid JSON tasks, re-reading only changed files."""
+        # Just try to open the directory; a separate exists() check would cost an extra stat every tick
+        try:
+            entries = os.scandir(self.tasks_dir)
+        except FileNotFoundError:
             logger.warning(f"Tasks directory {self.tasks_dir} does not exist.")
             return
 
-        for filename in os.listdir(self.tasks_dir):
-            if filename.endswith(".json"):
-                filepath = os.path.join(self.tasks_dir, filename)
+        found = [] # (filepath, filename, stat key)
+        with entries:
+            for entry in entries:
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
                 try:
-                    with open(filepath, "r", encoding="utf-8") as f:
-                        task_data = json.load(f)
-                        yield filepath, task_data, filename
-                except Exception as e:
-                    logger.error(f"Failed to load task {filename}: {e}")
+                    stat = entry.stat()
+                except OSError as e:
+                    logger.error(f"Failed to load task {entry.name}: {e}")
+                    continue
+                found.append((entry.path, entry.name, (stat.st_mtime_ns, stat.st_size)))
+
+        # Forget tasks whose files were removed
+        for filepath in self._task_cache.keys() - {filepath for filepath, _, _ in found}:
+            del self._task_cache[filepath]
+
+        # Read every new or changed file in one batch instead of one thread hop per file
+        changed = [(filepath, key) for filepath, _, key in found
+                   if self._task_cache.get(filepath, (None,))[0] != key]
+        results = await self._read_tasks([filepath for filepath, _ in changed])
+        failed = set()
+        for (filepath, key), result in zip(changed, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to load task {os.path.basename(filepath)}: {result}")
+                failed.add(filepath)
+            else:
+                self._task_cache[filepath] = (key, result)
+
+        for filepath, filename, _ in found:
+            if filepath not in failed:
+                yield filepath, self._task_cache[filepath][1], filename
 
     async def process_tasks(self):
-        """Checks all tasks and runs them if due."""
+        """Checks all tasks and runs the due ones concurrently (at most max_concurrency at a time)."""
         logger.info("Checking for due tasks...")
-        now = datetime.datetime.now().astimezone() # Aware datetime
+        # Read the clock once per tick and share it for every task's due check and normalization;
+        # reports are timestamped when they are written
+        local_now = datetime.datetime.now()
+        now = local_now.astimezone() # Aware datetime
 
-        tasks_run_count = 0
+        due = []
+        self._due_heap = []
 
-        for filepath, task, filename in self.load_tasks():
-            name = task.get("name", filename)
-            raw_next_run = task.get("next_run")
-            frequency = task.get("frequency", "daily")
+        async for filepath, task, filename in self.load_tasks():
+            name = task.name or filename
+            raw_next_run = task.next_run
+            frequency = task.frequency or DEFAULT_FREQUENCY
             
             # Normalize next_run (handles "Now", None, Date-only, etc.)
             try:
-                normalized_next_run = normalize_next_run(raw_next_run, frequency)
+                normalized_next_run = normalize_next_run(raw_next_run, frequency, now=local_now)
             except Exception as e:
                 logger.error(f"Failed to normalize next_run for {name}: {e}")
                 continue
@@ -73,99 +139,176 @@ class TaskScheduler:
             # save it back to the file immediately.
             if normalized_next_run != raw_next_run:
                 logger.info(f"Normalizing 'next_run' for task '{name}': '{raw_next_run}' -> '{normalized_next_run}'")
-                task["next_run"] = normalized_next_run
+                task.next_run = normalized_next_run
+                self._task_cache.pop(filepath, None) # Cached copy is about to go stale
                 try:
-                    with open(filepath, "w", encoding="utf-8") as f:
-                        json.dump(task, f, indent=4)
+                    await self._write_task(filepath, task)
                 except Exception as e:
                     logger.error(f"Failed to save normalized task {name}: {e}")
                     # Continue using the normalized value in memory
             
             # Now proceed with standard checking
-            next_run_str = task["next_run"]
+            next_run_str = task.next_run
             
             try:
-                next_run = parser.isoparse(next_run_str)
+                next_run = parse_iso(next_run_str)
                 # Ensure next_run is aware if possible, or assume local
                 if next_run.tzinfo is None:
                     next_run = next_run.replace(tzinfo=now.tzinfo)
 
                 if now >= next_run:
-                    # If we have already run a task in this cycle, pause before the next one
-                    if tasks_run_count > 0:
-                        logger.info(f"Pausing for {self.task_delay} seconds before next task to reduce system load...")
-                        await asyncio.sleep(self.task_delay)
-
-                    logger.info(f"Task '{name}' is due (Next run: {next_run_str}). Executing...")
-                    
-                    # Execute Task
-                    result_data = await self.runner.run_task(task)
-                    tasks_run_count += 1
-                    
-                    report = result_data.get("report", "")
-                    new_context = result_data.get("new_context", {})
-                    
-                    # Save Result (Report)
-                    output_path = task.get("output")
-                    saved_path = save_task_result(name, report, output_path=output_path, root_dir=self.root_dir)
-                    
-                    # Logging raw result for debug purpose
-                    logger.info(f"Task result saved to: {saved_path}")
-                    
-                    if "Error" in report and len(report) < 200: 
-                        # intense error check, but be careful not to flag generic text. 
-                        # If the report is JUST an error message, we might want to retry?
-                        # For now, let's assume if we got a report, we succeeded, unless it's the specific "Error executing..." fallback
-                        if report.startswith("Error executing task:"):
-                             logger.warning(f"Task '{name}' failed with system error. Schedule will NOT be updated. Will retry next cycle.")
-                             continue
-
-                    # Update Context with the result (learning/research loop)
-                    task["context"] = new_context
-                    
-                    # If we have a delta history, we might want to append? 
-                    # The prompt says "NEW_MEMORY: ... updates the context field". 
-                    # So we assume the agent returns the FULL new context state, OR we merge?
-                    # The prompt says: "A structured JSON object that updates the context field".
-                    # Usually means "replace". Let's assume replace or the agent includes previous info if needed.
-                    # Given the "State Awareness" prompt, the agent sees old context. 
-                    # Use replace to allow agent to curate memory.
-
-                    # Update Schedule ONLY on success
-                    new_next_run = calculate_next_run(next_run_str, frequency)
-                    task["next_run"] = new_next_run
-                    
-                    # Save Updated Task File
-                    with open(filepath, "w", encoding="utf-8") as f:
-                        json.dump(task, f, indent=4)
-                        
-                    logger.info(f"Task '{name}' completed successfully. Next run updated to {new_next_run}.")
+                    due.append((filepath, task, name))
                 else:
                     # Debug log - usually too verbose for production but good for verifying loaded tasks
                     # logger.debug(f"Task '{name}' not due yet. Next run: {next_run_str}")
-                    pass
+                    self._push_due(next_run, filepath)
 
             except Exception as e:
                 logger.error(f"Error processing task {name}: {e}", exc_info=True)
 
+        if not due:
+            return
+
+        # The work is dominated by LLM round trips, so run due tasks concurrently.
+        # The semaphore bounds how many hit the API at once.
+        sem = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_bounded(task, name):
+            async with sem:
+                return await self._execute_task(task, name)
+
+        results = await asyncio.gather(*(run_bounded(task, name) for _, task, name in due))
+        completed = [(entry, result) for entry, result in zip(due, results) if result is not None]
+
+        # Save Results (Reports) for the whole tick in one batch
+        saved_paths = await save_task_results_batch(
+            [(name, result.get("report", ""), task.output) for (_, task, name), result in completed],
+            root_dir=self.root_dir)
+
+        await asyncio.gather(*(self._persist_result(filepath, task, name, result, saved_path)
+                               for ((filepath, task, name), result), saved_path in zip(completed, saved_paths)))
+
+    async def _execute_task(self, task: Task, name: str):
+        """Runs a single due task. Returns the runner's result dict, or None if it raised."""
+        logger.info(f"Task '{name}' is due (Next run: {task.next_run}). Executing...")
+        try:
+            return await self.runner.run_task(task.to_dict())
+        except Exception as e:
+            logger.error(f"Error processing task {name}: {e}", exc_info=True)
+            return None
+
+    async def _persist_result(self, filepath: str, task: Task, name: str, result_data: dict, saved_path):
+        """On success, stores the task's new context and schedule. saved_path is the report path or the save error."""
+
+        try:
+            if isinstance(saved_path, Exception):
+                raise saved_path
+
+            report = result_data.get("report", "")
+            new_context = result_data.get("new_context", {})
+            
+            # Logging raw result for debug purpose
+            logger.info(f"Task result saved to: {saved_path}")
+            
+            if "Error" in report and len(report) < 200: 
+                # intense error check, but be careful not to flag generic text. 
+                # If the report is JUST an error message, we might want to retry?
+                # For now, let's assume if we got a report, we succeeded, unless it's the specific "Error executing..." fallback
+                if report.startswith("Error executing task:"):
+                     logger.warning(f"Task '{name}' failed with system error. Schedule will NOT be updated. Will retry next cycle.")
+                     return
+
+            # Update Context with the result (learning/research loop)
+            self._task_cache.pop(filepath, None) # Cached copy is about to go stale
+            task.context = new_context
+            
+            # If we have a delta history, we might want to append? 
+            # The prompt says "NEW_MEMORY: ... updates the context field". 
+            # So we assume the agent returns the FULL new context state, OR we merge?
+            # The prompt says: "A structured JSON object that updates the context field".
+            # Usually means "replace". Let's assume replace or the agent includes previous info if needed.
+            # Given the "State Awareness" prompt, the agent sees old context. 
+            # Use replace to allow agent to curate memory.
+
+            # Update Schedule ONLY on success
+            new_next_run = advance(task.next_run, task._delta)
+            task.next_run = new_next_run
+            
+            # Save Updated Task File
+            await self._write_task(filepath, task)
+                
+            logger.info(f"Task '{name}' completed successfully. Next run updated to {new_next_run}.")
+            self._push_due(parse_iso(new_next_run), filepath)
+
+        except Exception as e:
+            logger.error(f"Error processing task {name}: {e}", exc_info=True)
+
+    def _push_due(self, next_run: datetime.datetime, filepath: str):
+        """Records a future next_run (naive values are local time) so the loop can wake up for it."""
+        timestamp = next_run.timestamp()
+        # Past-due entries are left to the regular check_interval poll, so a task that keeps
+        # failing or is still catching up does not trigger back-to-back cycles
+        if timestamp > time.time():
+            heapq.heappush(self._due_heap, (timestamp, filepath))
+
+    def _task_due(self) -> bool:
+        """O(1) check whether the earliest known next_run has passed."""
+        return bool(self._due_heap) and self._due_heap[0][0] <= time.time()
+
+    async def _run_async(self):
+        """Runs process_tasks every check_interval seconds, or earlier when a known task falls due."""
+        next_deadline = time.monotonic()
+        while self.running:
+            interval_elapsed = time.monotonic() >= next_deadline
+            if interval_elapsed or self._task_due():
+                await self.process_tasks()
+                if interval_elapsed:
+                    # Count from the end of the cycle, so a cycle slower than check_interval
+                    # is followed by a full interval of rest rather than an immediate rerun
+                    next_deadline = time.monotonic() + self.check_interval
+            # Sleep in short chunks so a stop request is noticed within ~1s instead of after check_interval
+            await asyncio.sleep(max(0.0, min(1.0, next_deadline - time.monotonic())))
+
     def start(self):
         """Starts the scheduling loop."""
         self.running = True
         logger.info(f"Scheduler started. Polling every {self.check_interval} seconds.")
         
-        loop = asyncio.new_event_loop()
+        if fast_loop is not None:
+            loop = fast_loop.new_event_loop()
+        else:
+            if sys.platform == 'win32':
+                # ProactorEventLoop misbehaves outside the main thread and with several HTTP clients
+                asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+            loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
+        self._loop = loop
 
         try:
-            while self.running:
-                loop.run_until_complete(self.process_tasks())
-                time.sleep(self.check_interval)
+            loop.run_until_complete(self._run_async())
         except KeyboardInterrupt:
             logger.info("Scheduler stopped by user.")
         except Exception as e:
             logger.critical(f"Scheduler crashed: {e}", exc_info=True)
+        finally:
+            self._loop = None
+            loop.close()
+
+    def stop(self):
+        """Signals the scheduling loop to exit. Safe to call from another thread."""
+        self.running = False
+        loop = self._loop
+        if loop is not None:
+            try:
+                # Wake the loop so the running flag is re-checked promptly
+                loop.call_soon_threadsafe(lambda: None)
+            except RuntimeError:
+                pass # Loop already closed
             
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
     # For testing, run with a shorter interval
     scheduler = TaskScheduler(check_interval=60)
     scheduler.start()
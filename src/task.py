@@ -0,0 +1,56 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+from .utils import get_frequency_delta
+
+DEFAULT_FREQUENCY = "daily"
+
+@dataclass(slots=True)
+class Task:
+    """
+    A scheduled task, as stored in tasks/*.json (see tasks/template_task.py for what each field means).
+    Slots keep loaded tasks compact and make field access an attribute lookup instead of a dict lookup.
+    Fields missing from the file stay None, and to_dict only writes back the keys the file had plus
+    fields set since, so saving a task never adds defaults the user did not ask for.
+    """
+    name: Optional[str] = None
+    frequency: Optional[str] = None
+    next_run: Optional[str] = None
+    task_definition: Optional[str] = None
+    context: Any = None
+    output: Optional[str] = None
+    tools: Optional[List[str]] = None
+    model: Optional[str] = None
+    # Keys in the task file that are not modeled above (e.g. legacy 'prompt'), kept so saving doesn't drop them
+    extra: Dict[str, Any] = field(default_factory=dict)
+    # Keys of the file this task was loaded from, in their original order
+    _keys: tuple = field(default=(), init=False, repr=False, compare=False)
+    # Delta for 'frequency', resolved once at load so rescheduling never re-parses the string
+    _delta: Any = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._delta = get_frequency_delta(self.frequency or DEFAULT_FREQUENCY)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Task":
+        """Builds a Task from a parsed task file."""
+        values = dict(data)
+        extra = {key: values.pop(key) for key in data if key not in _FILE_FIELDS}
+        task = cls(**values, extra=extra)
+        task._keys = tuple(data)
+        return task
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the task in its file (and TaskRunner) form."""
+        data = {key: self.extra[key] if key in self.extra else getattr(self, key) for key in self._keys}
+        for key in _FILE_FIELDS:
+            if key not in data:
+                value = getattr(self, key)
+                if value is not None:
+                    data[key] = value
+        for key, value in self.extra.items():
+            data.setdefault(key, value)
+        return data
+
+# Task file keys that map onto Task fields; anything else goes to Task.extra
+_FILE_FIELDS = tuple(f.name for f in fields(Task) if f.init and f.name != "extra")
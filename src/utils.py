@@ -1,83 +1,275 @@
 import os
+import re
+import json
+import queue
+import atexit
+import asyncio
+import threading
 import logging
+import functools
+import logging.handlers
 import datetime
+from typing import List, Optional, Tuple, Union
 from dateutil import parser
 from dateutil.relativedelta import relativedelta
 
+# orjson is optional; it parses several times faster than the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# For the helpers' own warnings; reaches whatever handlers the application configures
+logger = logging.getLogger(__name__)
+
+def json_loads(data):
+    """Parses JSON from str or bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj) -> bytes:
+    """Serializes obj to UTF-8 JSON bytes indented by 2 spaces (the only indent orjson supports)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+def load_task(task_path: str) -> dict:
+    """Reads and parses a task file."""
+    with open(task_path, "rb") as f:
+        return json_loads(f.read())
+
+def save_task(task_path: str, task: dict):
+    """
+    Serializes a task dict and writes it to task_path.
+    The bytes go to '<task_path>.tmp' in a single os.write and are then swapped in with
+    os.replace, so a crash never leaves a half-written task file.
+    """
+    payload = json_dumps(task)
+    tmp_path = task_path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, task_path)
+
+# Directories this process has already created or found to exist
+_ensured_dirs: set = set()
+
+def _ensure_dir(path: str):
+    """Creates path if needed; skips the filesystem entirely once the directory is known to exist."""
+    if path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
+
+def _open_for_write(file_path: str, mode: str = "w"):
+    """
+    Opens file_path for writing. If its directory was deleted after _ensure_dir cached it,
+    recreates the directory and retries once instead of failing until the process restarts.
+    """
+    try:
+        return open(file_path, mode, encoding="utf-8")
+    except FileNotFoundError:
+        dir_name = os.path.dirname(file_path)
+        if not dir_name:
+            raise
+        _ensured_dirs.discard(dir_name)
+        _ensure_dir(dir_name)
+        return open(file_path, mode, encoding="utf-8")
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that writes through a large buffer instead of flushing after every record.
+    Pending records are flushed by a background thread flush_interval seconds after the first
+    unflushed write, immediately for ERROR and above, and on close().
+    """
+    def __init__(self, filename: str, buffer_size: int = 65536, flush_interval: float = 1.0, encoding: str = None):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._pending = threading.Event() # Set while records are waiting to be flushed
+        self._closing = threading.Event()
+        super().__init__(filename, encoding=encoding)
+        # One long-lived flusher per handler, rather than a new timer thread per flush window
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"LogFlusher-{os.path.basename(filename)}", daemon=True)
+        self._flusher.start()
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                    encoding=self.encoding, errors=self.errors)
+
+    def emit(self, record):
+        # Called with self.lock held (Handler.handle)
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+            return
+
+        if record.levelno >= logging.ERROR:
+            self.flush()
+        elif not self._pending.is_set():
+            self._pending.set()
+
+    def _flush_loop(self):
+        while not self._closing.is_set():
+            self._pending.wait()
+            # Let records accumulate for flush_interval (cut short by close())
+            self._closing.wait(self.flush_interval)
+            # Cleared before flushing, so a record written during the flush re-arms the next cycle
+            self._pending.clear()
+            self.flush()
+
+    def close(self):
+        self._closing.set()
+        self._pending.set() # Wake the flusher if it is idle
+        if self._flusher is not threading.current_thread():
+            self._flusher.join()
+        super().close() # Flushes the buffer before closing the stream
+
+# Every logger configured by setup_logging enqueues into this one queue; a single background
+# QueueListener (started by the first setup_logging call) formats and writes all records
+_log_queue = queue.Queue(-1)
+_log_listener = None
+_queued_loggers = set()
+
+@functools.lru_cache(maxsize=None)
 def setup_logging(name: str, log_dir: str = "logs", root_dir: str = None) -> logging.Logger:
-    """Configures and returns a logger."""
+    """
+    Configures and returns a logger.
+    Records are handed to a queue and written to the log file and console by a background
+    QueueListener, so logging calls never block on I/O.
+    Memoized per (name, log_dir, root_dir): repeat calls return the configured logger directly.
+    """
+    global _log_listener
     if root_dir:
         log_dir = os.path.join(root_dir, log_dir)
 
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+    _ensure_dir(log_dir)
     
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
     
     # Check if handlers already exist to avoid duplicate logs
     if not logger.handlers:
-        file_handler = logging.FileHandler(os.path.join(log_dir, f"{name}.log"))
-        console_handler = logging.StreamHandler()
-        
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+        if _log_listener is None:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+            _log_listener = logging.handlers.QueueListener(_log_queue, console_handler)
+            _log_listener.start()
+
+        file_handler = BufferedFileHandler(os.path.join(log_dir, f"{name}.log"))
         file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-        
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        # The listener is shared, so each log file only accepts its own logger's records
+        file_handler.addFilter(logging.Filter(name))
+        _log_listener.handlers += (file_handler,)
+
+        logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+        _queued_loggers.add(name)
         
     return logger
 
-def get_frequency_delta(frequency: str) -> relativedelta:
-    """Parses a frequency string into a relativedelta."""
-    freq_lower = frequency.lower()
-    
-    if freq_lower == 'daily':
-        return relativedelta(days=1)
-    elif freq_lower == 'weekly':
-        return relativedelta(weeks=1)
-    elif freq_lower == 'monthly':
-        return relativedelta(months=1)
-    elif 'day' in freq_lower:
-        try:
-            parts = freq_lower.split()
-            amount = int(parts[0])
-            return relativedelta(days=amount)
-        except (ValueError, IndexError):
-            return relativedelta(days=1)
-    elif 'week' in freq_lower:
-         try:
-            parts = freq_lower.split()
-            amount = int(parts[0])
-            return relativedelta(weeks=amount)
-         except (ValueError, IndexError):
-            return relativedelta(weeks=1)
-    elif 'month' in freq_lower:
-         try:
-            parts = freq_lower.split()
-            amount = int(parts[0])
-            return relativedelta(months=amount)
-         except (ValueError, IndexError):
-            return relativedelta(months=1)
+def stop_logging():
+    """Flushes pending log records and stops the listener thread started by setup_logging."""
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    _log_listener = None
+    # Drop the QueueHandlers so a later setup_logging call starts a fresh listener
+    while _queued_loggers:
+        logging.getLogger(_queued_loggers.pop()).handlers.clear()
+    setup_logging.cache_clear()
+
+atexit.register(stop_logging)
+
+def parse_iso(value: str) -> datetime.datetime:
+    """Parses an ISO 8601 string with the C-level fromisoformat, falling back to dateutil."""
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00" # fromisoformat only accepts 'Z' from Python 3.11
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return parser.isoparse(value) # Malformed or legacy entries
+
+def get_frequency_delta(frequency: str) -> Union[datetime.timedelta, relativedelta]:
+    """
+    Parses a frequency string into a delta.
+    Day/week frequencies use timedelta (C-level arithmetic); only month frequencies need
+    relativedelta's calendar-aware arithmetic.
+    """
+    # Normalize before the cache lookup so "Daily " and "daily" share an entry
+    return _frequency_delta(frequency.lower().strip())
+
+# Keyword frequencies, and the "N day(s)/week(s)/month(s)" form, resolved with one dict
+# lookup or one anchored regex match instead of an if/elif chain of substring checks
+_FIXED_FREQUENCIES = {
+    'daily': datetime.timedelta(days=1),
+    'weekly': datetime.timedelta(weeks=1),
+    'monthly': relativedelta(months=1),
+}
+_FREQUENCY_RE = re.compile(r"^(\d+)\s*(day|week|month)s?$")
+# Free-form fallback: a unit as a whole word ("every week", "biweekly", "2 months"), and the first number anywhere
+_UNIT_WORD_RE = re.compile(r"\b(?:bi)?(day|week|month)(?:s|ly)?\b")
+_NUMBER_RE = re.compile(r"\d+")
+_UNIT_DELTAS = {
+    'day': lambda amount: datetime.timedelta(days=amount),
+    'week': lambda amount: datetime.timedelta(weeks=amount),
+    'month': lambda amount: relativedelta(months=amount),
+}
+
+@functools.lru_cache(maxsize=128)
+def _frequency_delta(freq_lower: str) -> Union[datetime.timedelta, relativedelta]:
+    # Cached: only a handful of distinct frequencies exist, and callers only ever add the
+    # returned delta to a datetime, so sharing one instance is safe
+    fixed = _FIXED_FREQUENCIES.get(freq_lower)
+    if fixed is not None:
+        return fixed
+
+    match = _FREQUENCY_RE.match(freq_lower)
+    if match:
+        return _UNIT_DELTAS[match.group(2)](int(match.group(1)))
+
+    # Free-form strings ("every week", "every 2 weeks"): a unit word resolves to that unit, taking
+    # the first number in the string if there is one and 1 otherwise. Units are only matched as
+    # whole words, so "2 mondays" is not read as 2 days.
+    unit_match = _UNIT_WORD_RE.search(freq_lower)
+    if unit_match:
+        number_match = _NUMBER_RE.search(freq_lower)
+        delta = _UNIT_DELTAS[unit_match.group(1)](int(number_match.group()) if number_match else 1)
     else:
         # Default fallback
-        return relativedelta(days=1)
+        delta = datetime.timedelta(days=1)
+    # The cache above means this is logged once per distinct string
+    logger.warning(f"Unrecognized frequency '{freq_lower}', using {delta}.")
+    return delta
 
 def calculate_next_run(current_run_iso: str, frequency: str) -> str:
     """
     Calculates the next run time based on frequency.
-    Supported frequencies: 'daily', 'weekly', 'monthly', 'X days', 'X weeks'.
+    Supported frequencies: 'daily', 'weekly', 'monthly', 'X days', 'X weeks', 'X months'.
     """
-    current_run = parser.isoparse(current_run_iso)
-    # Ensure current_run is naive if we are doing simple arithmetic or aware if needed, 
-    # but relativedelta handles both fine. 
-    
-    delta = get_frequency_delta(frequency)
-    next_time = current_run + delta
-    return next_time.isoformat()
+    return advance(current_run_iso, get_frequency_delta(frequency))
+
+def advance(current_run_iso: str, delta: Union[datetime.timedelta, relativedelta]) -> str:
+    """Adds a precomputed frequency delta (see get_frequency_delta) to an ISO timestamp."""
+    # timedelta and relativedelta both handle naive and aware datetimes fine
+    return (parse_iso(current_run_iso) + delta).isoformat()
+
+# "YYYY-MM-DD" next_run values, which default to 07:00 on that date
+_DATE_ONLY_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
 
-def normalize_next_run(next_run_val, frequency: str) -> str:
+def normalize_next_run(next_run_val, frequency: str, now: datetime.datetime = None) -> str:
     """
     Parses and normalizes the 'next_run' field into a standard ISO 8601 string.
     Handles:
@@ -86,35 +278,43 @@ def normalize_next_run(next_run_val, frequency: str) -> str:
     - "YYYY-MM-DD" -> Returns "YYYY-MM-DDT07:00:00".
     - "YYYY-MM-DDTHH:MM" -> Returns "YYYY-MM-DDTHH:MM:00".
     - ISO strings -> Returns as is.
+    'now' (naive local time) lets callers share one timestamp across a scheduler tick.
     """
-    now = datetime.datetime.now().replace(microsecond=0)
+    now = now or datetime.datetime.now()
+    # Values come straight from JSON, so an exact type check is enough; strip only once
+    is_str = type(next_run_val) is str
+    stripped = next_run_val.strip() if is_str else ""
     
     # Handle None or Empty
-    if not next_run_val or (isinstance(next_run_val, str) and not next_run_val.strip()):
+    if not next_run_val or (is_str and not stripped):
         delta = get_frequency_delta(frequency)
         future_date = now + delta
         # Default to 07:00 AM
         future_date = future_date.replace(hour=7, minute=0, second=0, microsecond=0)
-        return future_date.isoformat()
+        return future_date.isoformat(timespec='seconds')
 
-    if isinstance(next_run_val, str):
-        val_lower = next_run_val.strip().lower()
-        
+    if is_str:
         # Handle "Now"
-        if val_lower == "now":
-            return now.isoformat()
+        if stripped.lower() == "now":
+            # Truncate to seconds while formatting instead of building a new datetime
+            return now.isoformat(timespec='seconds')
         
-        # Handle Date Only (YYYY-MM-DD) - Length 10
-        if len(next_run_val.strip()) == 10 and "T" not in next_run_val:
+        # Handle Date Only (YYYY-MM-DD)
+        date_match = _DATE_ONLY_RE.match(stripped)
+        if date_match:
             try:
-                # Validate it's a date
-                dt = parser.parse(next_run_val)
+                year, month, day = map(int, date_match.groups())
                 # Set to 07:00 AM
-                dt = dt.replace(hour=7, minute=0, second=0, microsecond=0)
-                return dt.isoformat()
-            except parser.ParserError:
-                pass # Fall through to standard parser
+                return datetime.datetime(year, month, day, 7, 0, 0).isoformat()
+            except ValueError:
+                pass # Not a real date; fall through to standard parser
                 
+        # Try ISO first (the common case after the first run) to skip dateutil's format inference
+        try:
+            return datetime.datetime.fromisoformat(stripped).isoformat()
+        except ValueError:
+            pass # Fall through to standard parser
+
         # Handle HH:MM without seconds (auto-handled by parser usually, but let's be safe)
         try:
             dt = parser.parse(next_run_val)
@@ -129,7 +329,8 @@ def save_task_result(task_name: str, result_content: str, base_dir: str = "task_
     """
     Saves the task result.
     If output_path is provided, saves to that specific file (creating dirs if needed).
-    Otherwise, saves to base_dir/task_name/timestamp.txt.
+    Otherwise, saves to base_dir/task_name/timestamp.txt, adding a _2, _3, ... suffix
+    rather than overwriting a report already saved in the same second.
     If root_dir is provided, it is prepended to base_dir (if base_dir is relative) 
     or output_path (if output_path is relative).
     """
@@ -145,19 +346,60 @@ def save_task_result(task_name: str, result_content: str, base_dir: str = "task_
         file_path = output_path
         # Ensure directory exists
         dir_name = os.path.dirname(file_path)
-        if dir_name and not os.path.exists(dir_name):
-            os.makedirs(dir_name)
+        if dir_name:
+            _ensure_dir(dir_name)
+        f = _open_for_write(file_path)
     else:
         # Default behavior
         task_dir = os.path.join(base_dir, task_name)
-        if not os.path.exists(task_dir):
-            os.makedirs(task_dir)
+        _ensure_dir(task_dir)
             
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"{timestamp}.txt"
-        file_path = os.path.join(task_dir, filename)
+        # Same as strftime("%Y-%m-%d_%H-%M-%S") without the locale-aware format machinery
+        n = datetime.datetime.now()
+        timestamp = f"{n.year:04d}-{n.month:02d}-{n.day:02d}_{n.hour:02d}-{n.minute:02d}-{n.second:02d}"
+        file_path = os.path.join(task_dir, f"{timestamp}.txt")
+        # Exclusive create, so tasks sharing a name never overwrite each other's reports
+        suffix = 1
+        while True:
+            try:
+                f = _open_for_write(file_path, "x")
+                break
+            except FileExistsError:
+                suffix += 1
+                file_path = os.path.join(task_dir, f"{timestamp}_{suffix}.txt")
     
-    with open(file_path, "w", encoding="utf-8") as f:
+    with f:
         f.write(result_content)
     
     return file_path
+
+async def save_task_results_batch(results: List[Tuple[str, str, Optional[str]]], base_dir: str = "task_results", root_dir: str = None) -> list:
+    """
+    Saves several (task_name, result_content, output_path) results concurrently, sharing
+    directory creation through _ensure_dir.
+    Results with the same output_path are written one after another in a single worker thread
+    (the last one wins), so concurrent writes never interleave in one file; every other result
+    gets a worker thread of its own.
+    Returns the saved file path, or the exception raised while saving, for each entry in order.
+    """
+    groups = {} # output_path (or the entry's index, for default paths) -> entry indices
+    for index, (_, _, output_path) in enumerate(results):
+        groups.setdefault(os.path.normpath(output_path) if output_path else index, []).append(index)
+
+    def save_group(indices: List[int]) -> list:
+        saved = []
+        for index in indices:
+            task_name, result_content, output_path = results[index]
+            try:
+                saved.append(save_task_result(task_name, result_content, base_dir=base_dir,
+                                              output_path=output_path, root_dir=root_dir))
+            except Exception as e:
+                saved.append(e)
+        return saved
+
+    saved_groups = await asyncio.gather(*(asyncio.to_thread(save_group, indices) for indices in groups.values()))
+    saved_paths = [None] * len(results)
+    for indices, saved in zip(groups.values(), saved_groups):
+        for index, saved_path in zip(indices, saved):
+            saved_paths[index] = saved_path
+    return saved_paths
@@ -1,5 +1,5 @@
 import os
-import json
+import time
 import datetime
 import asyncio
 import shutil
@@ -9,8 +9,9 @@ import sys
 # Add src to path to allow imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from dateutil import parser
+from src import scheduler as scheduler_module
 from src.scheduler import TaskScheduler
+from src.utils import load_task, save_task, stop_logging
 
 async def mock_run_task(task_config):
     print(f"MOCK running task: {task_config['name']}")
@@ -41,12 +42,11 @@ def test_scheduler_logic_safe():
         "context": {}
     }
     
-    with open(test_task_path, "w") as f:
-        json.dump(task_data, f)
+    save_task(test_task_path, task_data)
 
     try:
         # Initialize scheduler with the TEMP directory
-        scheduler = TaskScheduler(tasks_dir=tasks_dir, check_interval=1)
+        scheduler = TaskScheduler(tasks_dir=tasks_dir, check_interval=1, root_dir=temp_dir)
         # Monkey patch runner
         scheduler.runner.run_task = mock_run_task
         
@@ -54,28 +54,123 @@ def test_scheduler_logic_safe():
         asyncio.run(scheduler.process_tasks())
         
         # Verify Next Run Update
-        with open(test_task_path, "r") as f:
-            updated_task = json.load(f)
+        updated_task = load_task(test_task_path)
             
-        old_run = parser.isoparse(past_iso)
-        new_run = parser.isoparse(updated_task["next_run"])
+        old_run = datetime.datetime.fromisoformat(past_iso)
+        new_run = datetime.datetime.fromisoformat(updated_task["next_run"])
         
-        if new_run > old_run:
-             print(f"PASS: next_run updated to {new_run}")
-        else:
-             print(f"FAIL: next_run not updated properly. Got {new_run}")
+        assert new_run > old_run, f"next_run not updated properly. Got {new_run}"
+        print(f"PASS: next_run updated to {new_run}")
 
         # Verify Context Update
         expected_context = {"last_run": "success", "data": 123}
-        if updated_task.get("context") == expected_context:
-             print("PASS: Context updated successfully.")
-        else:
-             print(f"FAIL: Context not updated. Got {updated_task.get('context')}")
+        assert updated_task.get("context") == expected_context, f"Context not updated. Got {updated_task.get('context')}"
+        print("PASS: Context updated successfully.")
 
     finally:
-        # Cleanup temp directory
+        # Cleanup temp directory (closing the log file opened under it first)
+        stop_logging()
         shutil.rmtree(temp_dir)
         print("Safe test complete. Temp files removed.")
 
+def _make_scheduler(tmp_path, next_run: str, report: str):
+    """Scheduler (polling hourly) over one task due at next_run, whose runs return report. Also returns the run times."""
+    tasks_dir = tmp_path / "tasks"
+    tasks_dir.mkdir()
+    save_task(str(tasks_dir / "task.json"), {"name": "Wake Task", "frequency": "daily", "next_run": next_run, "prompt": "Do nothing"})
+
+    scheduler = TaskScheduler(tasks_dir=str(tasks_dir), check_interval=3600, root_dir=str(tmp_path))
+    runs = []
+
+    async def run_task(task_config):
+        runs.append(time.time())
+        return {"report": report, "new_context": {"runs": len(runs)}}
+
+    scheduler.runner.run_task = run_task
+    return scheduler, runs
+
+class _FakeClock:
+    """
+    Replaces the scheduler module's 'time' and asyncio.sleep, so the scheduling loop runs in
+    simulated time: sleeping advances the clock instantly, and the loop stops after stop_after seconds.
+    """
+    def __init__(self, monkeypatch, scheduler, stop_after: float, start: float = 0.0):
+        self.now = start
+        self.scheduler = scheduler
+        self.stop_at = start + stop_after
+        monkeypatch.setattr(scheduler_module, "time", self)
+        monkeypatch.setattr(asyncio, "sleep", self.sleep)
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        self.now += delay
+        if self.now >= self.stop_at:
+            self.scheduler.running = False
+
+    def run(self):
+        self.scheduler.running = True
+        asyncio.run(self.scheduler._run_async())
+
+def test_slow_cycle_is_followed_by_full_interval(tmp_path, monkeypatch):
+    scheduler = TaskScheduler(tasks_dir=str(tmp_path / "tasks"), check_interval=1, root_dir=str(tmp_path))
+    clock = _FakeClock(monkeypatch, scheduler, stop_after=10)
+    starts = []
+
+    async def slow_process_tasks():
+        starts.append(clock.now)
+        clock.now += 2.5 # Takes longer than check_interval
+
+    scheduler.process_tasks = slow_process_tasks
+    clock.run()
+
+    # Each cycle waits a full check_interval after the previous one ends, instead of catching up
+    assert starts == [0.0, 3.5, 7.0]
+
+def test_future_task_is_queued_for_wakeup(tmp_path, monkeypatch):
+    due_at = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(hours=1)
+    scheduler, runs = _make_scheduler(tmp_path, due_at.isoformat(), "Done")
+
+    asyncio.run(scheduler.process_tasks())
+
+    assert runs == []
+    assert scheduler._due_heap == [(due_at.timestamp(), str(tmp_path / "tasks" / "task.json"))]
+    assert not scheduler._task_due()
+    # Once its next_run passes, the loop's O(1) check reports it due
+    _FakeClock(monkeypatch, scheduler, stop_after=0, start=due_at.timestamp())
+    assert scheduler._task_due()
+
+def test_loop_wakes_for_due_task_before_check_interval(tmp_path, monkeypatch):
+    scheduler = TaskScheduler(tasks_dir=str(tmp_path / "tasks"), check_interval=3600, root_dir=str(tmp_path))
+    clock = _FakeClock(monkeypatch, scheduler, stop_after=60)
+    starts = []
+
+    async def process_tasks():
+        starts.append(clock.now)
+        # Like the real method, rebuild the heap from the future next_runs: one task due at 5s
+        scheduler._due_heap = [(5.0, "task.json")] if clock.now < 5.0 else []
+
+    scheduler.process_tasks = process_tasks
+    clock.run()
+
+    # Polled at start, then woke for the task instead of waiting out the hour
+    assert starts == [0.0, 5.0]
+
+def test_past_due_failing_task_does_not_spin(tmp_path, monkeypatch):
+    past = (datetime.datetime.now() - datetime.timedelta(hours=1)).isoformat(timespec="seconds")
+    scheduler, runs = _make_scheduler(tmp_path, past, "Error executing task: boom")
+    clock = _FakeClock(monkeypatch, scheduler, stop_after=60, start=time.time())
+
+    clock.run()
+
+    # Tried once on the first poll and kept off the heap; the retry waits for the next check_interval
+    assert len(runs) == 1
+    assert scheduler._due_heap == []
+    assert load_task(str(tmp_path / "tasks" / "task.json"))["next_run"] == past
+
 if __name__ == "__main__":
     test_scheduler_logic_safe()
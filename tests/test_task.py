@@ -0,0 +1,67 @@
+import os
+import sys
+import datetime
+
+# Add src to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dateutil.relativedelta import relativedelta
+
+from src.task import Task
+
+def test_round_trip_preserves_file_exactly():
+    data = {
+        "name": "Research",
+        "frequency": "2 weeks",
+        "next_run": "2026-01-01T07:00:00",
+        "custom_flag": True,
+        "task_definition": "Find news.",
+        "context": {"iteration_count": 3},
+        "output": None,
+        "tools": ["google_search"],
+        "model": "gemini-2.5-flash",
+    }
+    task = Task.from_dict(data)
+
+    assert task.extra == {"custom_flag": True}
+    # Same keys, values and order, including the explicit null
+    assert list(task.to_dict().items()) == list(data.items())
+
+def test_missing_optional_fields_are_not_written_back():
+    data = {"name": "Minimal", "next_run": "2026-01-01T07:00:00", "task_definition": "Do it."}
+    task = Task.from_dict(data)
+
+    assert task.to_dict() == data
+    assert task.frequency is None
+    assert task._delta == datetime.timedelta(days=1) # Defaults to daily
+
+def test_legacy_prompt_is_kept_as_is():
+    data = {"name": "Legacy", "frequency": "monthly", "next_run": "2026-01-01T07:00:00", "prompt": "Old style."}
+    task = Task.from_dict(data)
+
+    assert task.task_definition is None
+    assert task.to_dict() == data
+    assert "task_definition" not in task.to_dict()
+    assert task._delta == relativedelta(months=1)
+
+def test_fields_set_after_loading_are_written():
+    task = Task.from_dict({"name": "Fresh", "prompt": "Old style."})
+    task.next_run = "2026-01-02T07:00:00"
+    task.context = {"done": True}
+
+    assert task.to_dict() == {
+        "name": "Fresh",
+        "prompt": "Old style.",
+        "next_run": "2026-01-02T07:00:00",
+        "context": {"done": True},
+    }
+
+def test_constructed_task_writes_only_set_fields():
+    task = Task(name="Template Task", frequency="weekly", task_definition="Describe it.", tools=["google_search"])
+
+    assert task.to_dict() == {
+        "name": "Template Task",
+        "frequency": "weekly",
+        "task_definition": "Describe it.",
+        "tools": ["google_search"],
+    }
@@ -0,0 +1,74 @@
+import os
+import sys
+import shutil
+import asyncio
+import logging
+import datetime
+
+# Add src to path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dateutil.relativedelta import relativedelta
+
+from src.utils import get_frequency_delta, save_task_result, save_task_results_batch
+
+def test_frequency_delta_known_forms():
+    assert get_frequency_delta("daily") == datetime.timedelta(days=1)
+    assert get_frequency_delta(" Weekly ") == datetime.timedelta(weeks=1)
+    assert get_frequency_delta("monthly") == relativedelta(months=1)
+    assert get_frequency_delta("3 days") == datetime.timedelta(days=3)
+    assert get_frequency_delta("2 weeks") == datetime.timedelta(weeks=2)
+    assert get_frequency_delta("6 months") == relativedelta(months=6)
+
+def test_frequency_delta_free_form_falls_back_to_unit():
+    assert get_frequency_delta("every week") == datetime.timedelta(weeks=1)
+    assert get_frequency_delta("biweekly") == datetime.timedelta(weeks=1)
+    assert get_frequency_delta("every month") == relativedelta(months=1)
+    assert get_frequency_delta("every 2 weeks") == datetime.timedelta(weeks=2)
+    assert get_frequency_delta("3 months or so") == relativedelta(months=3)
+    assert get_frequency_delta("whenever") == datetime.timedelta(days=1)
+
+def test_frequency_delta_matches_units_as_whole_words():
+    # 'day' inside another word is not a unit; these fall back to the 1 day default
+    assert get_frequency_delta("2 mondays") == datetime.timedelta(days=1)
+    assert get_frequency_delta("every weekday") == datetime.timedelta(days=1)
+
+def test_frequency_delta_warns_on_unrecognized(caplog):
+    with caplog.at_level(logging.WARNING, logger="src.utils"):
+        assert get_frequency_delta("once a month or so") == relativedelta(months=1)
+    assert "Unrecognized frequency 'once a month or so'" in caplog.text
+
+def test_save_task_result_recreates_deleted_directory(tmp_path):
+    first = save_task_result("Task", "one", root_dir=str(tmp_path))
+    # Deleted while the process runs, after the directory was cached as existing
+    shutil.rmtree(os.path.dirname(first))
+    second = save_task_result("Task", "two", output_path="reports/out.md", root_dir=str(tmp_path))
+    shutil.rmtree(os.path.dirname(second))
+    third = save_task_result("Task", "three", root_dir=str(tmp_path))
+    fourth = save_task_result("Task", "four", output_path="reports/out.md", root_dir=str(tmp_path))
+
+    with open(third, encoding="utf-8") as f:
+        assert f.read() == "three"
+    with open(fourth, encoding="utf-8") as f:
+        assert f.read() == "four"
+
+def test_save_task_results_batch_keeps_every_report(tmp_path):
+    saved = asyncio.run(save_task_results_batch([
+        ("Template Task", "first", None),
+        ("Template Task", "second", None),
+        ("Other", "third", "reports/shared.md"),
+        ("Other", "fourth", "reports/shared.md"),
+    ], root_dir=str(tmp_path)))
+
+    assert not any(isinstance(path, Exception) for path in saved)
+    # Same task name in the same second: two distinct files, neither overwritten
+    assert saved[0] != saved[1]
+    contents = set()
+    for path in saved[:2]:
+        with open(path, encoding="utf-8") as f:
+            contents.add(f.read())
+    assert contents == {"first", "second"}
+    # Same explicit output path: written in order, so the last result wins
+    assert saved[2] == saved[3]
+    with open(saved[3], encoding="utf-8") as f:
+        assert f.read() == "fourth"